@@ -1,14 +1,21 @@
+import threading
+
 import pygame
 import serial, time
 
-pygame.init()
-joystick_count = pygame.joystick.get_count()
-if joystick_count > 0:
-    my_joystick = pygame.joystick.Joystick(0) 
-    my_joystick.init()
 
-    while True:
-        for event in pygame.event.get():
+def joystick_loop():
+    """Leer eventos del joystick bloqueando hasta que llegue uno"""
+    pygame.init()
+    joystick_count = pygame.joystick.get_count()
+    if joystick_count > 0:
+        my_joystick = pygame.joystick.Joystick(0)
+        my_joystick.init()
+
+        while True:
+            # event.wait() duerme el thread hasta que llegue un evento,
+            # en lugar de sondear event.get() al 100% de CPU
+            event = pygame.event.wait()
             if event.type == pygame.JOYBUTTONDOWN:
                 button_number = event.button
                 print(f"Button {button_number} pressed")
@@ -17,6 +24,16 @@ if joystick_count > 0:
                 button_number = event.button
                 print(f"Button {button_number} released")
 
-else:
-    print("No joysticks connected.")
+    else:
+        print("No joysticks connected.")
+
+
+def start_joystick_thread():
+    """Lanzar joystick_loop en un thread daemon (para integrarlo con main.py)"""
+    t = threading.Thread(target=joystick_loop, daemon=True)
+    t.start()
+    return t
+
 
+if __name__ == "__main__":
+    joystick_loop()
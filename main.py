@@ -1,825 +1,1208 @@
-import flet as ft
-import math
-import json
-import os
-import serial
-import threading
-from datetime import datetime
-import pygame
-import serial, time
-
-class RobotModel:
-    def __init__(self):
-        self.angle1 = 0.0
-        self.angle2 = 0.0
-        self.z = 0.0
-        self.x = -2.9083
-        self.y = 18.4984
-        self.l1 = 9.51  # Longitud del primer segmento (cm)
-        self.l2 = 22.31  # Longitud del segundo segmento (cm)
-        self.theta = math.radians(122.77133)  # Ángulo constante
-        self.positions = []
-        self.program_running = False
-        
-    def update_angles(self, a1, a2, z):
-        """Actualizar ángulos y calcular posición forward kinematics"""
-        self.angle1 = a1
-        self.angle2 = a2
-        self.z = z
-        self.calculate_forward_kinematics()
-    
-    def calculate_forward_kinematics(self):
-        """Calcular posición X, Y a partir de los ángulos (Forward Kinematics)"""
-        # Convertir angle1 (q2) y angle2 (q3) a radianes
-        q2_rad = math.radians(self.angle1)
-        q3_rad = math.radians(self.angle2)
-        
-        # Calcular r (radio en el plano XY)
-        # De las ecuaciones inversas: D = cos(phi), phi = -(q3 + theta - pi)
-        phi = -(q3_rad + self.theta - math.pi)
-        D = math.cos(phi)
-        
-        # De D = (l1^2 + l2^2 - r^2)/(2*l1*l2), resolver para r
-        r_squared = self.l1**2 + self.l2**2 - 2*self.l1*self.l2*D
-        r = math.sqrt(max(0, r_squared))
-        
-        # Calcular beta usando la ley de cosenos
-        if r > 0:
-            A = (self.l1**2 + r**2 - self.l2**2)/(2*self.l1*r)
-            A = max(-1, min(1, A))  # Limitar entre -1 y 1
-            beta = math.atan2(math.sqrt(1-A**2), A)
-            
-            # Calcular alpha a partir de q2
-            alpha = q2_rad + beta
-            
-            # Calcular x, y
-            self.x = r * math.cos(alpha)
-            self.y = r * math.sin(alpha)
-        else:
-            self.x = 0
-            self.y = 0
-    
-    def inverse_kinematics(self, x, y):
-        """Calcular ángulos a partir de X, Y (Inverse Kinematics)"""
-        try:
-            # Calcular r (radio en el plano XY)
-            r = math.sqrt((x**2) + (y**2))
-            
-            # Verificar si la posición es alcanzable
-            if r < abs(self.l1 - self.l2) or r > (self.l1 + self.l2):
-                return False  # Posición inalcanzable
-            
-            # theta = 123 grados
-            theta = math.radians(123)
-            
-            # Cálculo de q3
-            A = ((self.l1**2) + (self.l2**2) - (r**2)) / (2 * self.l1 * self.l2)
-            A = max(-1, min(1, A))  # Limitar entre -1 y 1
-            
-            alpha = math.atan2(-math.sqrt(1 - A**2), A)
-            q3 = (math.pi - theta - alpha) - 2 * math.pi
-            
-            # Cálculo de q2
-            beta = math.atan2(y, x)
-            D = ((r**2) + (self.l1**2) - (self.l2**2)) / (2 * r * self.l1)
-            D = max(-1, min(1, D))  # Limitar entre -1 y 1
-            
-            phi = math.atan2(-math.sqrt(1 - D**2), D)
-            q2 = beta - phi
-            
-            # q1 = z (se maneja por separado)
-            
-            # Convertir a grados
-            self.angle1 = math.degrees(q2)  # q2 -> angle1 (mostrado como q1 en UI)
-            self.angle2 = math.degrees(q3)  # q3 -> angle2 (mostrado como q2 en UI)
-            
-            # Redondear valores muy cercanos a cero
-            if abs(self.angle1) < 0.01:
-                self.angle1 = 0.0
-            if abs(self.angle2) < 0.01:
-                self.angle2 = 0.0
-            
-            return True
-        except Exception as e:
-            print(f"Error en IK: {e}")
-            return False
-    
-    def save_position(self):
-        """Guardar posición actual"""
-        pos = {
-            'angle1': round(self.angle1, 2),
-            'angle2': round(self.angle2, 2),
-            'z': round(self.z, 2),
-            'x': round(self.x, 2),
-            'y': round(self.y, 2),
-        }
-        self.positions.append(pos)
-        return len(self.positions) - 1
-    
-    def clear_positions(self):
-        """Limpiar todas las posiciones guardadas"""
-        self.positions = []
-    
-    def save_to_file(self, filename='robot_program.json'):
-        """Guardar programa a archivo"""
-        try:
-            with open(filename, 'w') as f:
-                json.dump({
-                    'positions': self.positions,
-                }, f, indent=2)
-            return True
-        except:
-            return False
-    
-    def load_from_file(self, filename='robot_program.json'):
-        """Cargar programa desde archivo"""
-        try:
-            if os.path.exists(filename):
-                with open(filename, 'r') as f:
-                    data = json.load(f)
-                    self.positions = data.get('positions', [])
-                return True
-        except:
-            pass
-        return False
-
-
-# ==================== SERIAL COMMUNICATION ====================
-
-ser = None
-serial_connected = False
-
-def init_serial(port='COM6', baudrate=115200):
-    """Inicializar comunicación serial"""
-    global ser, serial_connected
-    try:
-        ser = serial.Serial(port, baudrate, timeout=1)
-        serial_connected = True
-        print(f"Serial connected to {port} at {baudrate} baud")
-        return True
-    except Exception as e:
-        print(f"Serial connection error: {e}")
-        serial_connected = False
-        return False
-
-def send_serial(command):
-    """Enviar comando al puerto serial"""
-    global ser, serial_connected
-    if serial_connected and ser and ser.is_open:
-        try:
-            ser.write(command.encode('utf-8'))
-            ser.flush()
-            print(f"Sent: {command}")
-        except Exception as e:
-            print(f"Send error: {e}")
-
-def read_serial_thread(callbacks):
-    """Thread para leer datos del puerto serial"""
-    global ser, serial_connected
-    while serial_connected:
-        try:
-            if ser and ser.in_waiting > 0:
-                data = ser.readline().decode('utf-8').strip()
-                if data:
-                    print(f"Received: {data}")
-                    for callback in callbacks:
-                        callback(data)
-        except Exception as e:
-            print(f"Read error: {e}")
-        
-def close_serial():
-    """Cerrar puerto serial"""
-    global ser, serial_connected
-    serial_connected = False
-    if ser and ser.is_open:
-        ser.close()
-        print("Serial port closed")
-
-
-def main(page: ft.Page):
-    page.title = "SCARA Robot Control"
-    page.window_width = 1400
-    page.window_height = 900
-    page.theme_mode = ft.ThemeMode.LIGHT
-    
-    robot = RobotModel()
-    robot.load_from_file()
-
-
-
-        
-    # ==================== SERIAL COMMUNICATION SETUP ====================
-    
-    # Intentar conectar al puerto serial
-    serial_port = 'COM6'  # Cambiado de COM3 a COM11
-    init_serial(serial_port, 9600)
-    
-    # Variable para estado del serial
-    serial_status_text = ft.Text("Serial: Desconectado", size=12, color=ft.colors.RED)
-    
-    def update_serial_status():
-        """Actualizar estado del serial en la UI"""
-        if serial_connected:
-            serial_status_text.value = "Serial: Conectado (COM)"
-            serial_status_text.color = ft.colors.GREEN
-        else:
-            serial_status_text.value = "Serial: Desconectado"
-            serial_status_text.color = ft.colors.RED
-        page.update()
-    
-    # Callback para datos recibidos del serial
-    def on_serial_data(data):
-        """Procesar datos recibidos del puerto serial"""
-        print(f"Processing serial data: {data}")
-        
-        # Parsear comandos del serial
-        if data.startswith("J1:"):
-            try:
-                val = float(data.split(":")[1])
-                j1_slider.value = val
-                update_sliders_and_info()
-            except:
-                pass
-        elif data.startswith("J2:"):
-            try:
-                val = float(data.split(":")[1])
-                j2_slider.value = val
-                update_sliders_and_info()
-            except:
-                pass
-        elif data.startswith("Z:"):
-            try:
-                val = float(data.split(":")[1])
-                z_slider.value = val
-                update_sliders_and_info()
-            except:
-                pass
-        elif data == "SAVE_POS":
-            save_position_teach(None)
-        elif data == "RUN_PROG":
-            run_program(None)
-        elif data == "CLEAR_PROG":
-            clear_program(None)
-    
-    # Iniciar thread de lectura serial
-    threading.Thread(
-        target=read_serial_thread,
-        args=([on_serial_data],),
-        daemon=True
-    ).start()
-    
-    update_serial_status()
-    
-    # ==================== JOYSTICK SETUP ====================
-    
-    def joystick_thread():
-        """Thread para leer eventos del joystick"""
-        pygame.init()
-        joystick_count = pygame.joystick.get_count()
-        
-        if joystick_count > 0:
-            my_joystick = pygame.joystick.Joystick(0)
-            my_joystick.init()
-            print(f"Joystick conectado: {my_joystick.get_name()}")
-            
-            while True:
-                for event in pygame.event.get():
-                    if event.type == pygame.JOYBUTTONUP:
-                        button_number = event.button
-                        print(f"Button {button_number} released")
-                        
-                        if button_number == 0:
-                            robot.y -= 1
-                        elif button_number == 1:
-                            robot.x -= 1
-                        elif button_number == 2:
-                            robot.x += 1
-                        elif button_number == 3:
-                            robot.y += 1
-                        elif button_number == 4:
-                            robot.z = 1000
-                        elif button_number == 5:
-                            robot.z = 0
-                        elif button_number == 10:
-                            # Mover a posición home
-                            robot.x = -2.9083
-                            robot.y = 18.4983
-                            robot.z = 0
-                        
-                        # Calcular cinemática inversa con los nuevos valores
-                        if button_number in [0, 1, 2, 3, 4, 5, 10]:
-                            if robot.inverse_kinematics(robot.x, robot.y):
-                                # Actualizar sliders con los nuevos ángulos calculados
-                                j1_slider.value = robot.angle1
-                                j2_slider.value = robot.angle2
-                                z_slider.value = robot.z
-                                
-                                # Actualizar displays
-                                x_display.value = f"X: {robot.x:.2f}"
-                                y_display.value = f"Y: {robot.y:.2f}"
-                                z_display.value = f"Z: {robot.z:.2f}"
-                                
-                                # Actualizar campos de cinemática inversa
-                                x_input.value = f"{robot.x:.2f}"
-                                y_input.value = f"{robot.y:.2f}"
-                                z_input.value = f"{robot.z:.2f}"
-                                
-                                # Actualizar valores de ángulos
-                                j1_value.value = f"{robot.angle1:.1f}"
-                                j2_value.value = f"{robot.angle2:.1f}"
-                                z_value.value = f"{robot.z:.1f}"
-                                
-                                # Enviar comandos al serial
-                                send_serial(f"J1:{robot.angle1:.2f}\n")
-                                send_serial(f"J2:{robot.angle2:.2f}\n")
-                                send_serial(f"Z:{robot.z:.2f}\n")
-                                send_serial("d\n")
-                                
-                                page.update()
-                            else:
-                                print("Posición inalcanzable")
-                                # Revertir el cambio si la posición es inalcanzable
-                                if button_number == 0:
-                                    robot.y += 1
-                                elif button_number == 1:
-                                    robot.x += 1
-                                elif button_number == 2:
-                                    robot.x -= 1
-                                elif button_number == 3:
-                                    robot.y -= 1
-                                elif button_number == 10:
-                                    # No revertir para home, mantener valores anteriores
-                                    pass
-
-                
-                pygame.time.wait(10)
-        else:
-            print("No joysticks connected.")
-    
-    # Iniciar thread del joystick
-    threading.Thread(target=joystick_thread, daemon=True).start()
-    
-    # ==================== FORWARD KINEMATICS SECTION ====================
-    
-    j1_slider = ft.Slider(min=-200, max=266, value=0, width=300, label="J1")
-    j2_slider = ft.Slider(min=-300, max=300, value=0, width=300, label="J2")
-    z_slider = ft.Slider(min=0, max=1000, value=0, width=300, label="Z")
-    
-    j1_value = ft.TextField(value="0", read_only=True, width=80)
-    j2_value = ft.TextField(value="0", read_only=True, width=80)
-    z_value = ft.TextField(value="0", read_only=True, width=80)
-    
-    j1_jog_val = ft.TextField(value="1", width=50, input_filter=ft.NumbersOnlyInputFilter())
-    j2_jog_val = ft.TextField(value="1", width=50, input_filter=ft.NumbersOnlyInputFilter())
-    z_jog_val = ft.TextField(value="1", width=50, input_filter=ft.NumbersOnlyInputFilter())
-    
-    # ==================== INVERSE KINEMATICS SECTION ====================
-    
-    x_input = ft.TextField(label="X", width=100, value="-2.91", keyboard_type=ft.KeyboardType.NUMBER)
-    y_input = ft.TextField(label="Y", width=100, value="18.50", keyboard_type=ft.KeyboardType.NUMBER)
-    z_input = ft.TextField(label="Z", width=100, value="0", keyboard_type=ft.KeyboardType.NUMBER)
-    
-    # ==================== TEACH MODE SECTION ====================
-    
-    positions_list = ft.ListView(expand=True, spacing=5)
-    last_position_text = ft.Text("Ultima posición guardada: Ninguna", size=14)
-    
-    # ==================== INFO DISPLAY ====================
-    
-    x_display = ft.Text("X: -2.91", size=14)
-    y_display = ft.Text("Y: 18.50", size=14)
-    z_display = ft.Text("Z: 0.00", size=14)
-    
-    def update_sliders_and_info():
-        """Actualizar información después de cambios en sliders"""
-        robot.update_angles(
-            float(j1_slider.value),
-            float(j2_slider.value),
-            float(z_slider.value)
-        )
-        
-        j1_value.value = f"{robot.angle1:.1f}"
-        j2_value.value = f"{robot.angle2:.1f}"
-        z_value.value = f"{robot.z:.1f}"
-        
-        x_display.value = f"X: {robot.x:.2f}"
-        y_display.value = f"Y: {robot.y:.2f}"
-        z_display.value = f"Z: {robot.z:.2f}"
-        
-        # Actualizar también los campos de cinemática inversa
-        x_input.value = f"{robot.x:.2f}"
-        y_input.value = f"{robot.y:.2f}"
-        z_input.value = f"{robot.z:.2f}"
-        
-        page.update()
-    
-    def on_j1_change(e):
-        update_sliders_and_info()
-        send_serial(f"J1:{robot.angle1:.2f}\n")
-        send_serial(f"J2:{robot.angle2:.2f}\n")
-        send_serial(f"Z:{robot.z:.2f}\n")
-    
-    def on_j2_change(e):
-        update_sliders_and_info()
-        send_serial(f"J1:{robot.angle1:.2f}\n")
-        send_serial(f"J2:{robot.angle2:.2f}\n")
-        send_serial(f"Z:{robot.z:.2f}\n")
-    
-    def on_z_change(e):
-        update_sliders_and_info()
-        send_serial(f"J1:{robot.angle1:.2f}\n")
-        send_serial(f"J2:{robot.angle2:.2f}\n")
-        send_serial(f"Z:{robot.z:.2f}\n")
-    
-    j1_slider.on_change = on_j1_change
-    j2_slider.on_change = on_j2_change
-    z_slider.on_change = on_z_change
-    
-    def jog_minus(slider, jog_field):
-        try:
-            current = float(slider.value)
-            jog_amount = float(jog_field.value)
-            slider.value = max(slider.min, current - jog_amount)
-            update_sliders_and_info()
-            # Enviar comandos al serial
-            send_serial(f"J1:{robot.angle1:.2f}\n")
-            send_serial(f"J2:{robot.angle2:.2f}\n")
-            send_serial(f"Z:{robot.z:.2f}\n")
-        except:
-            pass
-    
-    def jog_plus(slider, jog_field):
-        try:
-            current = float(slider.value)
-            jog_amount = float(jog_field.value)
-            slider.value = min(slider.max, current + jog_amount)
-            update_sliders_and_info()
-            # Enviar comandos al serial
-            send_serial(f"J1:{robot.angle1:.2f}\n")
-            send_serial(f"J2:{robot.angle2:.2f}\n")
-            send_serial(f"Z:{robot.z:.2f}\n")
-        except:
-            pass
-    
-    def bajar_plumon(e):
-        """Bajar plumón - establecer Z en 0"""
-        z_slider.value = 0
-        robot.z = 0
-        z_value.value = "0.0"
-        z_display.value = "Z: 0.00"
-        z_input.value = "0"
-        send_serial(f"Z:0.00\n")
-        page.snack_bar = ft.SnackBar(ft.Text("Plumón bajado"))
-        page.snack_bar.open = True
-        page.update()
-    
-    def subir_plumon(e):
-        """Subir plumón - establecer Z en 1000"""
-        z_slider.value = 1000
-        robot.z = 1000
-        z_value.value = "1000.0"
-        z_display.value = "Z: 1000.00"
-        z_input.value = "1000"
-        send_serial(f"Z:1000.00\n")
-        page.snack_bar = ft.SnackBar(ft.Text("Plumón subido"))
-        page.snack_bar.open = True
-        page.update()
-    
-    # JOG buttons
-    j1_minus_btn = ft.ElevatedButton("-", width=70, on_click=lambda e: jog_minus(j1_slider, j1_jog_val))
-    j1_plus_btn = ft.ElevatedButton("+", width=70, on_click=lambda e: jog_plus(j1_slider, j1_jog_val))
-    
-    j2_minus_btn = ft.ElevatedButton("-", width=70, on_click=lambda e: jog_minus(j2_slider, j2_jog_val))
-    j2_plus_btn = ft.ElevatedButton("+", width=70, on_click=lambda e: jog_plus(j2_slider, j2_jog_val))
-    
-    bajar_plumon_btn = ft.ElevatedButton("Bajar plumón", width=150, on_click=bajar_plumon)
-    subir_plumon_btn = ft.ElevatedButton("Subir plumón", width=150, on_click=subir_plumon)
-    
-    def bajar_plumon_ik(e):
-        """Bajar plumón en cinemática inversa - establecer Z en 0"""
-        z_input.value = "0"
-        page.update()
-    
-    def subir_plumon_ik(e):
-        """Subir plumón en cinemática inversa - establecer Z en 1000"""
-        z_input.value = "1000"
-        page.update()
-    
-    bajar_plumon_ik_btn = ft.ElevatedButton("Bajar plumón", width=120, on_click=bajar_plumon_ik)
-    subir_plumon_ik_btn = ft.ElevatedButton("Subir plumón", width=120, on_click=subir_plumon_ik)
-    
-    def move_to_position(e):
-        """Mover a posición usando IK"""
-        try:
-            x = float(x_input.value)
-            y = float(y_input.value)
-            z = float(z_input.value)
-            
-            # Validar que Z esté dentro del rango del slider
-            if z < 0:
-                z = 0
-            elif z > 1000:
-                z = 1000
-            
-            if robot.inverse_kinematics(x, y):
-                # Validar que los ángulos estén dentro del rango de los sliders
-                angle1 = max(-200, min(266, robot.angle1))
-                angle2 = max(-300, min(300, robot.angle2))
-                
-                j1_slider.value = angle1
-                j2_slider.value = angle2
-                z_slider.value = z
-                
-                # Actualizar el robot con los valores validados
-                robot.angle1 = angle1
-                robot.angle2 = angle2
-                robot.z = z
-                
-                # Actualizar todos los campos
-                j1_value.value = f"{robot.angle1:.1f}"
-                j2_value.value = f"{robot.angle2:.1f}"
-                z_value.value = f"{robot.z:.1f}"
-                
-                # Mantener los valores originales de X, Y, Z que el usuario ingresó
-                x_display.value = f"X: {x:.2f}"
-                y_display.value = f"Y: {y:.2f}"
-                z_display.value = f"Z: {z:.2f}"
-                
-                # NO actualizar los campos de entrada para mantener los valores originales
-                # Los campos de entrada ya tienen los valores correctos
-                
-                # Enviar comandos al serial
-                send_serial(f"J1:{robot.angle1:.2f}\n")
-                send_serial(f"J2:{robot.angle2:.2f}\n")
-                send_serial(f"Z:{robot.z:.2f}\n")
-                
-                page.update()
-            else:
-                page.snack_bar = ft.SnackBar(ft.Text("¡Posición inalcanzable!"))
-                page.snack_bar.open = True
-                page.update()
-        except:
-            page.snack_bar = ft.SnackBar(ft.Text("Error en valores ingresados"))
-            page.snack_bar.open = True
-            page.update()
-    
-    move_btn = ft.ElevatedButton("MOVE TO POSITION", width=300, on_click=move_to_position)
-    
-    def move_to_home(e):
-        """Mover a posición home (q1=0, q2=0, Z=0)"""
-        try:
-            # Establecer ángulos directamente en 0
-            j1_slider.value = 0
-            j2_slider.value = 0
-            z_slider.value = 0
-            
-            # Actualizar el robot
-            robot.update_angles(0, 0, 0)
-            
-            # Actualizar todos los campos
-            j1_value.value = "0.0"
-            j2_value.value = "0.0"
-            z_value.value = "0.0"
-            
-            # Establecer las coordenadas específicas para home
-            x_display.value = "X: -2.90"
-            y_display.value = "Y: 18.49"
-            z_display.value = "Z: 0.00"
-            
-            # Actualizar campos de entrada con las coordenadas de home
-            x_input.value = "-2.9083"
-            y_input.value = "18.4984"
-            z_input.value = "0"
-            
-            # Enviar comandos al serial
-            send_serial(f"J1:0.00\n")
-            send_serial(f"J2:0.00\n")
-            send_serial(f"Z:0.00\n")
-            
-            page.snack_bar = ft.SnackBar(ft.Text("¡Movido a posición HOME (q1=0, q2=0, Z=0)!"))
-            page.snack_bar.open = True
-            page.update()
-        except Exception as ex:
-            page.snack_bar = ft.SnackBar(ft.Text(f"Error al mover a HOME: {str(ex)}"))
-            page.snack_bar.open = True
-            page.update()
-    
-    home_btn = ft.ElevatedButton("MOVER A HOME", width=300, on_click=move_to_home, bgcolor=ft.colors.ORANGE_400, color=ft.colors.WHITE)
-    
-    def save_position_teach(e):
-        """Guardar posición actual en modo Teach"""
-        idx = robot.save_position()
-        pos = robot.positions[idx]
-        
-        # Enviar al serial
-        send_serial(f"POS_SAVED:{idx+1},J1={pos['angle1']},J2={pos['angle2']},Z={pos['z']}")
-        
-        # Agregar a lista visual
-        pos_item = ft.Container(
-            content=ft.Row([
-                ft.Text(f"Pos {idx+1}: J1={pos['angle1']}° J2={pos['angle2']}° Z={pos['z']}", size=12),
-                ft.IconButton(
-                    ft.icons.DELETE,
-                    on_click=lambda e, i=idx: delete_position(i)
-                ),
-            ]),
-            padding=10,
-            border=ft.border.all(1, ft.colors.BLUE_200),
-            border_radius=5,
-            bgcolor=ft.colors.BLUE_50,
-        )
-        positions_list.controls.append(pos_item)
-        
-        last_position_text.value = f"Ultima posición guardada: #{idx+1}"
-        
-        page.snack_bar = ft.SnackBar(ft.Text(f"¡Posición {idx+1} guardada!"))
-        page.snack_bar.open = True
-        page.update()
-    
-    def delete_position(idx):
-        """Eliminar una posición"""
-        if 0 <= idx < len(robot.positions):
-            robot.positions.pop(idx)
-            positions_list.controls.clear()
-            
-            for i, pos in enumerate(robot.positions):
-                pos_item = ft.Container(
-                    content=ft.Row([
-                        ft.Text(f"Pos {i+1}: J1={pos['angle1']}° J2={pos['angle2']}° Z={pos['z']}", size=12),
-                        ft.IconButton(
-                            ft.icons.DELETE,
-                            on_click=lambda e, idx=i: delete_position(idx)
-                        ),
-                    ]),
-                    padding=10,
-                    border=ft.border.all(1, ft.colors.BLUE_200),
-                    border_radius=5,
-                    bgcolor=ft.colors.BLUE_50,
-                )
-                positions_list.controls.append(pos_item)
-            
-            page.update()
-    
-    def run_program(e):
-        """Ejecutar programa guardado"""
-        if len(robot.positions) == 0:
-            page.snack_bar = ft.SnackBar(ft.Text("¡No hay posiciones guardadas!"))
-            page.snack_bar.open = True
-            page.update()
-            return
-        
-        send_serial("RUN_PROGRAM")
-        for pos in robot.positions:
-            j1_slider.value = pos['angle1']
-            j2_slider.value = pos['angle2']
-            z_slider.value = pos['z']
-            update_sliders_and_info()
-            page.update()
-    
-    def clear_program(e):
-        """Limpiar programa"""
-        robot.clear_positions()
-        positions_list.controls.clear()
-        last_position_text.value = "Ultima posición guardada: Ninguna"
-        send_serial("CLEAR_PROGRAM")
-        page.snack_bar = ft.SnackBar(ft.Text("¡Programa eliminado!"))
-        page.snack_bar.open = True
-        page.update()
-    
-    def save_program(e):
-        """Guardar programa a archivo"""
-        if robot.save_to_file():
-            send_serial(f"SAVE_PROGRAM:{len(robot.positions)}")
-            page.snack_bar = ft.SnackBar(ft.Text("¡Programa guardado!"))
-            page.snack_bar.open = True
-            page.update()
-    
-    save_position_btn = ft.ElevatedButton("Guardar posición", width=200, on_click=save_position_teach)
-    run_program_btn = ft.ElevatedButton("Ejecutar programa", width=200, on_click=run_program)
-    clear_btn = ft.ElevatedButton("Limpiar", width=100, on_click=clear_program)
-    save_program_btn = ft.ElevatedButton("Guardar programa", width=200, on_click=save_program)
-    
-    # ==================== LAYOUT ====================
-    
-    forward_kinematics_section = ft.Container(
-        content=ft.Column([
-            ft.Text("Cinemática directa", size=18, weight="bold", color=ft.colors.BLUE_900),
-            ft.Divider(),
-            
-            # J1
-            ft.Row([ft.Text("q1", size=14, width=40, weight="bold"), j1_slider, j1_value], spacing=10),
-            ft.Row([ft.Text("", size=14, width=40), j1_minus_btn, j1_jog_val, j1_plus_btn], spacing=5),
-            
-            # J2
-            ft.Row([ft.Text("q2", size=14, width=40, weight="bold"), j2_slider, j2_value], spacing=10),
-            ft.Row([ft.Text("", size=14, width=40), j2_minus_btn, j2_jog_val, j2_plus_btn], spacing=5),
-            
-            # Z
-            ft.Row([ft.Text("Z", size=14, width=40, weight="bold"), z_slider, z_value], spacing=10),
-            ft.Row([ft.Text("", size=14, width=40), bajar_plumon_btn, subir_plumon_btn], spacing=5),
-            
-            ft.Divider(),
-            ft.Text("Resultado de cinemática directa", size=14, weight="bold"),
-            x_display,
-            y_display,
-            z_display,
-        ]),
-        padding=20,
-        border=ft.border.all(2, ft.colors.BLUE_400),
-        border_radius=10,
-        bgcolor=ft.colors.BLUE_50,
-    )
-    
-    inverse_kinematics_section = ft.Container(
-        content=ft.Column([
-            ft.Text("Cinemática inversa", size=18, weight="bold", color=ft.colors.GREEN_900),
-            ft.Divider(),
-            
-            ft.Row([x_input, y_input, z_input, bajar_plumon_ik_btn, subir_plumon_ik_btn], spacing=10),
-            move_btn,
-            home_btn,
-        ]),
-        padding=20,
-        border=ft.border.all(2, ft.colors.GREEN_400),
-        border_radius=10,
-        bgcolor=ft.colors.GREEN_50,
-    )
-    
-    teach_section = ft.Container(
-        content=ft.Column([
-            ft.Text("Modo Teach - Guardar posiciones", size=18, weight="bold", color=ft.colors.PINK_700),
-            ft.Divider(),
-            
-            last_position_text,
-            
-            ft.Row([save_position_btn, run_program_btn], spacing=10),
-            ft.Row([save_program_btn, clear_btn], spacing=10),
-            
-            ft.Text("Posiciones guardadas:", size=14, weight="bold"),
-            ft.Container(
-                content=positions_list,
-                height=250,
-                border=ft.border.all(1, ft.colors.GREY_300),
-                border_radius=5,
-            ),
-        ]),
-        padding=20,
-        border=ft.border.all(2, ft.colors.PINK_700),
-        border_radius=10,
-        bgcolor=ft.colors.PINK_50,
-        expand=True,
-    )
-    
-    # Layout principal
-    page.add(
-        ft.AppBar(
-            title=ft.Row([
-                ft.Text("Control del Robot SCARA", size=24, weight="bold"),
-                ft.VerticalDivider(),
-                serial_status_text,
-            ], spacing=20),
-            bgcolor=ft.colors.BLUE_900,
-            color=ft.colors.WHITE,
-        ),
-        ft.Row([
-            teach_section,
-            ft.Column([
-                forward_kinematics_section,
-                inverse_kinematics_section,
-            ], width=650, scroll=ft.ScrollMode.AUTO),
-        ], expand=True),
-    )
-    
-    # Inicializar información con valores home
-    # No llamar a update_sliders_and_info() porque sobrescribe los valores iniciales
-    x_input.value = f"{robot.x:.2f}"
-    y_input.value = f"{robot.y:.2f}"
-    z_input.value = f"{robot.z:.2f}"
-    
-    page.update()
-    
-    # Enviar valores iniciales a la placa
-    send_serial(f"J1:{robot.angle1:.2f}\n")
-    send_serial(f"J2:{robot.angle2:.2f}\n")
-    send_serial(f"Z:{robot.z:.2f}\n")
-    
-    # Cargar posiciones guardadas si existen
-    if robot.positions:
-        for i, pos in enumerate(robot.positions):
-            pos_item = ft.Container(
-                content=ft.Row([
-                    ft.Text(f"Pos {i+1}: J1={pos['angle1']}° J2={pos['angle2']}° Z={pos['z']}", size=12),
-                    ft.IconButton(
-                        ft.icons.DELETE,
-                        on_click=lambda e, idx=i: delete_position(idx)
-                    ),
-                ]),
-                padding=10,
-                border=ft.border.all(1, ft.colors.BLUE_200),
-                border_radius=5,
-                bgcolor=ft.colors.BLUE_50,
-            )
-            positions_list.controls.append(pos_item)
-
-if __name__ == "__main__":
-    ft.app(target=main)
+import flet as ft
+from math import cos, sin, sqrt, atan2, acos, hypot, radians, degrees, pi
+import array
+import numpy as np
+import json
+import os
+import queue
+import re
+import serial
+import threading
+import time
+
+# orjson (serializador C) si está instalado; si no, json estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Factor grados -> radianes precalculado para el camino caliente de FK/IK
+_D2R = pi / 180.0
+_R2D = 180.0 / pi
+
+# Tabla de sen/cos a 0.1° con interpolación lineal para la FK
+# interactiva: dos accesos a lista + una multiplicación siguen siendo
+# más baratos que libm y el error queda < 4e-7 en sen/cos. Ojo: solo
+# se usa para alpha (el sen/cos final); D = cos(phi) se calcula exacto
+# porque su error se amplifica sin cota en acos() cerca del borde del
+# workspace (al vecino más cercano el error en X/Y llegaba a ~0.046 cm
+# y con interpolación aún a ~9e-3 cm; con D exacto el máximo medido es
+# ~1.2e-5 cm, así que el camino escalar coincide con el exacto de
+# fk_batch a los 2 decimales del display y de las pos_x/pos_y
+# guardadas). El rango -360..720° cubre alpha (q2+beta); fuera de
+# rango se cae a math.sin/cos. La IK conserva el camino exacto.
+_TBL_MIN_DEG = -360.0
+_TBL_MAX_DEG = 720.0
+_TBL_SCALE = 10.0  # índices por grado (resolución 0.1°)
+_tbl_rad = np.radians(_TBL_MIN_DEG + np.arange(
+    int((_TBL_MAX_DEG - _TBL_MIN_DEG) * _TBL_SCALE) + 1) / _TBL_SCALE)
+_SIN_TBL = np.sin(_tbl_rad).tolist()
+_COS_TBL = np.cos(_tbl_rad).tolist()
+del _tbl_rad
+
+def _sin_deg(deg, _tbl=_SIN_TBL, _lo=_TBL_MIN_DEG, _hi=_TBL_MAX_DEG,
+             _scale=_TBL_SCALE, _sin=sin, _d2r=_D2R):
+    """Seno de un ángulo en grados: tabla + interpolación lineal
+    (fallback a math.sin fuera de rango)"""
+    if _lo <= deg < _hi:
+        pos = (deg - _lo) * _scale
+        i = int(pos)
+        s0 = _tbl[i]
+        return s0 + (_tbl[i + 1] - s0) * (pos - i)
+    return _sin(deg * _d2r)
+
+def _cos_deg(deg, _tbl=_COS_TBL, _lo=_TBL_MIN_DEG, _hi=_TBL_MAX_DEG,
+             _scale=_TBL_SCALE, _cos=cos, _d2r=_D2R):
+    """Coseno de un ángulo en grados: tabla + interpolación lineal
+    (fallback a math.cos fuera de rango)"""
+    if _lo <= deg < _hi:
+        pos = (deg - _lo) * _scale
+        i = int(pos)
+        c0 = _tbl[i]
+        return c0 + (_tbl[i + 1] - c0) * (pos - i)
+    return _cos(deg * _d2r)
+
+# Las líneas numéricas J1:/J2:/Z: dominan la telemetría entrante; un
+# solo regex compilado sobre bytes crudos las valida y captura eje +
+# valor en una pasada, sin decodificar UTF-8 por línea
+_TELEM_PAT = re.compile(rb'^(J1|J2|Z):(-?\d+(?:\.\d+)?)$')
+
+# Kernels numéricos de cinemática a nivel de módulo: cuerpos puros de
+# floats sin accesos a self, listos para un @njit de numba si algún día
+# se suma la dependencia. Los argumentos _-prefijados fijan las
+# funciones de math como locales (LOAD_FAST).
+
+def _fk(a1_deg, a2_deg, l1, l1sq, l2sq, l1sq_plus_l2sq, _2l1l2,
+        theta_shift_deg, _cos_deg=_cos_deg, _sin_deg=_sin_deg,
+        _sqrt=sqrt, _acos=acos, _cos=cos, _d2r=_D2R):
+    """Cinemática directa: (x, y) a partir de los ángulos en grados"""
+    # De las ecuaciones inversas: D = cos(phi), phi = -(q3 + theta - pi).
+    # D va exacto (no por tabla): acos() amplifica su error sin cota
+    # cerca del borde del workspace, ver el comentario de la tabla
+    phi_deg = -(a2_deg + theta_shift_deg)
+    D = _cos(phi_deg * _d2r)
+
+    # De D = (l1^2 + l2^2 - r^2)/(2*l1*l2), resolver para r
+    r_squared = l1sq_plus_l2sq - _2l1l2 * D
+    r = _sqrt(r_squared) if r_squared > 0 else 0.0
+
+    if r <= 0:
+        return 0.0, 0.0
+
+    # Calcular beta usando la ley de cosenos
+    A = (l1sq + r*r - l2sq) / (2.0 * l1 * r)
+    A = max(-1, min(1, A))  # Limitar entre -1 y 1
+    # acos(A) == atan2(sqrt(1-A^2), A), en una sola llamada libm
+    beta_deg = _acos(A) * _R2D
+
+    # Calcular alpha a partir de q2
+    alpha_deg = a1_deg + beta_deg
+
+    return r * _cos_deg(alpha_deg), r * _sin_deg(alpha_deg)
+
+def _ik(x, y, l1, l2, l1sq, l2sq, l1sq_plus_l2sq, _2l1l2,
+        _hypot=hypot, _acos=acos, _atan2=atan2, _degrees=degrees):
+    """Cinemática inversa: (ok, q2_deg, q3_deg) a partir de X, Y"""
+    # Calcular r (radio en el plano XY)
+    r = _hypot(x, y)
+
+    # Verificar si la posición es alcanzable
+    if r < abs(l1 - l2) or r > (l1 + l2):
+        return False, 0.0, 0.0  # Posición inalcanzable
+
+    # theta = 123 grados
+    theta = radians(123)
+
+    # Cálculo de q3
+    A = (l1sq_plus_l2sq - r*r) / _2l1l2
+    A = max(-1, min(1, A))  # Limitar entre -1 y 1
+
+    # -acos(A) == atan2(-sqrt(1-A^2), A): rama de codo negativa
+    alpha = -_acos(A)
+    q3 = (pi - theta - alpha) - 2 * pi
+
+    # Cálculo de q2
+    beta = _atan2(y, x)
+    D = (r*r + l1sq - l2sq) / (2 * r * l1)
+    D = max(-1, min(1, D))  # Limitar entre -1 y 1
+
+    phi = -_acos(D)
+    q2 = beta - phi
+
+    # q1 = z (se maneja por separado)
+
+    return True, _degrees(q2), _degrees(q3)
+
+
+class RobotModel:
+    # __slots__ evita el __dict__ por instancia: atributos como offsets
+    # fijos (acceso más rápido en los hot paths de FK/IK) y cualquier
+    # typo de atributo truena en vez de crear uno nuevo en silencio
+    __slots__ = (
+        'angle1', 'angle2', 'z', 'x', 'y',
+        'l1', 'l2', 'theta',
+        'pos_angle1', 'pos_angle2', 'pos_z', 'pos_x', 'pos_y',
+        'program_running', '_last_input',
+        '_l1sq', '_l2sq', '_2l1l2', '_l1sq_plus_l2sq',
+        '_theta_shift', '_theta_shift_deg',
+    )
+
+    def __init__(self):
+        self.angle1 = 0.0
+        self.angle2 = 0.0
+        self.z = 0.0
+        self.x = -2.9083
+        self.y = 18.4984
+        self.l1 = 9.51  # Longitud del primer segmento (cm)
+        self.l2 = 22.31  # Longitud del segundo segmento (cm)
+        self.theta = radians(122.77133)  # Ángulo constante
+        # Posiciones guardadas en layout SoA: una columna por campo en
+        # lugar de una lista de dicts (~300 bytes de overhead por dict),
+        # mucho menos memoria e iteración/serialización más rápida
+        self.pos_angle1 = array.array('d')
+        self.pos_angle2 = array.array('d')
+        self.pos_z = array.array('d')
+        self.pos_x = array.array('d')
+        self.pos_y = array.array('d')
+        self.program_running = False
+        # Última terna (a1, a2, z) ya calculada: Flet re-emite eventos
+        # de slider con el mismo valor (focus/blur y durante drags)
+        self._last_input = (None, None, None)
+        self._refresh_link_consts()
+        
+    def _refresh_link_consts(self):
+        """Precalcular constantes del brazo: FK/IK corren en cada
+        tick de slider, no recalcular l1^2, l2^2, 2*l1*l2 ahí.
+        Volver a llamar si cambian l1/l2/theta."""
+        self._l1sq = self.l1 * self.l1
+        self._l2sq = self.l2 * self.l2
+        self._2l1l2 = 2.0 * self.l1 * self.l2
+        self._l1sq_plus_l2sq = self._l1sq + self._l2sq
+        self._theta_shift = self.theta - pi
+        self._theta_shift_deg = self._theta_shift * _R2D
+
+    def update_angles(self, a1, a2, z):
+        """Actualizar ángulos y calcular posición forward kinematics.
+        Devuelve False (sin recalcular) si los valores no cambiaron."""
+        key = (a1, a2, z)
+        if key == self._last_input:
+            return False
+        self._last_input = key
+        self.angle1 = a1
+        self.angle2 = a2
+        self.z = z
+        self.calculate_forward_kinematics()
+        return True
+
+    def set_angles(self, a1, a2, z):
+        """Fijar ángulos directamente (sin recalcular FK), manteniendo
+        coherente el caché de update_angles para que un valor repetido
+        no se confunda con un no-cambio"""
+        self.angle1 = a1
+        self.angle2 = a2
+        self.z = z
+        self._last_input = (a1, a2, z)
+
+    def calculate_forward_kinematics(self):
+        """Calcular posición X, Y a partir de los ángulos (Forward Kinematics)"""
+        self.x, self.y = _fk(
+            self.angle1, self.angle2, self.l1,
+            self._l1sq, self._l2sq, self._l1sq_plus_l2sq,
+            self._2l1l2, self._theta_shift_deg,
+        )
+
+    def inverse_kinematics(self, x, y):
+        """Calcular ángulos a partir de X, Y (Inverse Kinematics)"""
+        try:
+            # Aquí (y en los callers del joystick que tocan z antes de
+            # llamar) los ángulos cambian fuera de update_angles:
+            # invalidar su caché para no dar un falso "sin cambios"
+            self._last_input = (None, None, None)
+            ok, q2_deg, q3_deg = _ik(
+                x, y, self.l1, self.l2,
+                self._l1sq, self._l2sq, self._l1sq_plus_l2sq, self._2l1l2,
+            )
+            if not ok:
+                return False  # Posición inalcanzable
+
+            self.angle1 = q2_deg  # q2 -> angle1 (mostrado como q1 en UI)
+            self.angle2 = q3_deg  # q3 -> angle2 (mostrado como q2 en UI)
+
+            # Redondear valores muy cercanos a cero
+            if abs(self.angle1) < 0.01:
+                self.angle1 = 0.0
+            if abs(self.angle2) < 0.01:
+                self.angle2 = 0.0
+
+            return True
+        except Exception as e:
+            print(f"Error en IK: {e}")
+            return False
+    
+    def fk_batch(self):
+        """Calcular X, Y de todas las posiciones guardadas en una sola
+        pasada vectorizada (mismas ecuaciones que la FK escalar)"""
+        a1 = np.asarray(self.pos_angle1)
+        a2 = np.asarray(self.pos_angle2)
+
+        phi = -(a2 * _D2R + self._theta_shift)
+        D = np.cos(phi)
+        r = np.sqrt(np.maximum(0.0, self._l1sq_plus_l2sq - self._2l1l2 * D))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            A = (self._l1sq + r*r - self._l2sq) / (2.0 * self.l1 * r)
+        A = np.clip(np.nan_to_num(A), -1.0, 1.0)
+        beta = np.arccos(A)
+        alpha = a1 * _D2R + beta
+
+        reachable = r > 0
+        x = np.where(reachable, r * np.cos(alpha), 0.0)
+        y = np.where(reachable, r * np.sin(alpha), 0.0)
+        return x, y
+
+    @property
+    def num_positions(self):
+        """Cantidad de posiciones guardadas"""
+        return len(self.pos_angle1)
+
+    def position(self, idx):
+        """Posición guardada idx como tupla (angle1, angle2, z)"""
+        return self.pos_angle1[idx], self.pos_angle2[idx], self.pos_z[idx]
+
+    def iter_positions(self):
+        """Iterar posiciones guardadas como tuplas (angle1, angle2, z)"""
+        return zip(self.pos_angle1, self.pos_angle2, self.pos_z)
+
+    def save_position(self):
+        """Guardar posición actual"""
+        self.pos_angle1.append(round(self.angle1, 2))
+        self.pos_angle2.append(round(self.angle2, 2))
+        self.pos_z.append(round(self.z, 2))
+        self.pos_x.append(round(self.x, 2))
+        self.pos_y.append(round(self.y, 2))
+        return len(self.pos_angle1) - 1
+
+    def delete_position(self, idx):
+        """Eliminar la posición guardada idx"""
+        del self.pos_angle1[idx]
+        del self.pos_angle2[idx]
+        del self.pos_z[idx]
+        del self.pos_x[idx]
+        del self.pos_y[idx]
+
+    def clear_positions(self):
+        """Limpiar todas las posiciones guardadas"""
+        del self.pos_angle1[:]
+        del self.pos_angle2[:]
+        del self.pos_z[:]
+        del self.pos_x[:]
+        del self.pos_y[:]
+
+    def save_to_file(self, filename='robot_program.json'):
+        """Guardar programa a archivo (escritura atómica)"""
+        data = {
+            'positions': {
+                'angle1': list(self.pos_angle1),
+                'angle2': list(self.pos_angle2),
+                'z': list(self.pos_z),
+                'x': list(self.pos_x),
+                'y': list(self.pos_y),
+            },
+        }
+        # Escribir a un .tmp y renombrar: un crash a mitad de escritura
+        # no corrompe el programa guardado
+        tmp = filename + '.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                if orjson is not None:
+                    f.write(orjson.dumps(data))
+                else:
+                    f.write(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, filename)
+            return True
+        except:
+            return False
+
+    def load_from_file(self, filename='robot_program.json'):
+        """Cargar programa desde archivo"""
+        try:
+            if os.path.exists(filename):
+                with open(filename, 'rb') as f:
+                    raw = f.read()
+                data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                self.clear_positions()
+                positions = data.get('positions', [])
+                if isinstance(positions, dict):
+                    # Formato SoA: una lista por columna
+                    self.pos_angle1.extend(positions.get('angle1', []))
+                    self.pos_angle2.extend(positions.get('angle2', []))
+                    self.pos_z.extend(positions.get('z', []))
+                    self.pos_x.extend(positions.get('x', []))
+                    self.pos_y.extend(positions.get('y', []))
+                else:
+                    # Formato legado: lista de dicts, un dict por posición
+                    for pos in positions:
+                        self.pos_angle1.append(pos['angle1'])
+                        self.pos_angle2.append(pos['angle2'])
+                        self.pos_z.append(pos['z'])
+                        self.pos_x.append(pos.get('x', 0.0))
+                        self.pos_y.append(pos.get('y', 0.0))
+                return True
+        except:
+            pass
+        return False
+
+
+# ==================== SERIAL COMMUNICATION ====================
+
+ser = None
+serial_connected = False
+
+# Cola acotada de transmisión: los callers encolan y retornan de
+# inmediato; un único thread escritor toca el puerto, así la UI nunca
+# se bloquea en un flush USB y no hay escrituras intercaladas
+tx_queue = queue.Queue(maxsize=128)
+
+# Serializa el acceso al puerto: el escritor no puede pisarse con un
+# close_serial desde otro thread (write-after-close)
+_ser_lock = threading.Lock()
+
+# Señal de parada para los threads de I/O: un Event es visible entre
+# threads (a diferencia de un bool global) y permite despertar al
+# lector bloqueado vía cancel_read()
+_stop_evt = threading.Event()
+
+def _set_low_latency(port):
+    """Pedir modo de baja latencia al driver USB-serial. Los FTDI/CDC-ACM
+    traen un timer de flush de 16 ms que retrasa los frames cortos del
+    protocolo; mejor esfuerzo, no todas las plataformas lo soportan."""
+    try:
+        port.set_low_latency_mode(True)
+        print("Serial low-latency mode enabled")
+    except Exception as e:
+        print(f"Low-latency mode not available: {e}")
+
+def init_serial(port='COM6', baudrate=115200):
+    """Inicializar comunicación serial"""
+    global ser, serial_connected
+    try:
+        ser = serial.Serial(port, baudrate, timeout=1)
+        _set_low_latency(ser)
+        _stop_evt.clear()
+        serial_connected = True
+        threading.Thread(target=serial_writer_thread, daemon=True).start()
+        print(f"Serial connected to {port} at {baudrate} baud")
+        return True
+    except Exception as e:
+        print(f"Serial connection error: {e}")
+        serial_connected = False
+        _stop_evt.set()
+        return False
+
+_AXIS_PREFIXES = (b'J1:', b'J2:', b'Z:')
+
+def _is_axis_frame(payload):
+    """True si el payload contiene solo líneas de setpoint de eje"""
+    return all(ln.startswith(_AXIS_PREFIXES) for ln in payload.splitlines())
+
+def _coalesce_batch(batch):
+    """Dentro de un lote drenado, conservar solo el último setpoint por
+    eje: las muestras intermedias de un drag ya están obsoletas cuando
+    el puerto se desocupa. Los comandos que no son de eje pasan todos y
+    actúan de barrera (un 'd' debe ejecutar con los setpoints previos)."""
+    out = []
+    latest = {}  # prefijo de eje -> índice en out
+    for payload in batch:
+        if _is_axis_frame(payload):
+            for ln in payload.splitlines():
+                pref = ln.split(b':', 1)[0]
+                if pref in latest:
+                    out[latest[pref]] = None
+                latest[pref] = len(out)
+                out.append(ln + b'\n')
+        else:
+            out.append(payload)
+            latest.clear()
+    return [p for p in out if p is not None]
+
+def serial_writer_thread():
+    """Thread que drena tx_queue y escribe al puerto serial"""
+    global ser
+    while not _stop_evt.is_set():
+        try:
+            payload = tx_queue.get(timeout=1)
+        except queue.Empty:
+            continue
+        # Coalescer lo que ya esté encolado en un solo write + flush
+        chunks = [payload]
+        try:
+            while len(chunks) < 16:
+                chunks.append(tx_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if len(chunks) > 1:
+            chunks = _coalesce_batch(chunks)
+        with _ser_lock:
+            if ser and ser.is_open:
+                try:
+                    ser.write(b''.join(chunks))
+                    ser.flush()
+                except Exception as e:
+                    print(f"Send error: {e}")
+
+def _enqueue_tx(payload):
+    """Encolar bytes para el escritor; con la cola llena se descarta lo
+    más viejo para que siempre gane el setpoint más reciente"""
+    try:
+        tx_queue.put_nowait(payload)
+    except queue.Full:
+        try:
+            tx_queue.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            tx_queue.put_nowait(payload)
+        except queue.Full:
+            pass
+
+def send_serial(command):
+    """Enviar comando al puerto serial"""
+    if serial_connected and ser and ser.is_open:
+        # El protocolo es ASCII puro; el codificador ASCII de CPython
+        # es el camino rápido (memcpy) frente al de UTF-8
+        _enqueue_tx(command.encode('ascii'))
+        print(f"Sent: {command}")
+
+# Último valor enviado por eje: muestras adyacentes de un drag suelen
+# redondear al mismo valor a 2 decimales, no reenviarlas por USB
+_last_axis = {'J1': None, 'J2': None, 'Z': None}
+
+# Plantillas bytes pre-codificadas: b'J1:%.2f\n' % v formatea y codifica
+# en C de una vez, sin f-string + encode por comando
+_AXIS_TEMPLATES = {'J1': b'J1:%.2f\n', 'J2': b'J2:%.2f\n', 'Z': b'Z:%.2f\n'}
+
+def send_axis(prefix, value):
+    """Enviar un solo eje, omitiendo valores repetidos"""
+    v = round(value, 2)
+    if _last_axis.get(prefix) == v:
+        return
+    # Registrar el valor solo si de verdad se encola: si el puerto no
+    # está listo, un setpoint marcado como "enviado" quedaría dedupeado
+    # para siempre sin haber llegado a la placa
+    if serial_connected and ser and ser.is_open:
+        _last_axis[prefix] = v
+        payload = _AXIS_TEMPLATES[prefix] % v
+        _enqueue_tx(payload)
+        print(f"Sent: {payload!r}")
+
+def send_move(j1, j2, z):
+    """Enviar un setpoint coordinado J1/J2/Z como un solo frame,
+    incluyendo solo los ejes que cambiaron desde el último envío"""
+    if not (serial_connected and ser and ser.is_open):
+        return
+    cmds = []
+    for prefix, value in (('J1', j1), ('J2', j2), ('Z', z)):
+        v = round(value, 2)
+        if _last_axis[prefix] != v:
+            _last_axis[prefix] = v
+            cmds.append(_AXIS_TEMPLATES[prefix] % v)
+    if cmds:
+        payload = b''.join(cmds)
+        _enqueue_tx(payload)
+        print(f"Sent: {payload!r}")
+
+def read_serial_thread(callbacks):
+    """Thread para leer datos del puerto serial"""
+    global ser
+    while not _stop_evt.is_set():
+        try:
+            # readline() bloquea hasta que llega una línea (o vence el
+            # timeout de 1 s), sin quemar CPU sondeando in_waiting.
+            # Se entregan bytes crudos: el protocolo es ASCII y así se
+            # ahorra un decode por línea
+            line = ser.readline()
+            if not line:
+                continue
+            data = line.strip()
+            if data:
+                print(f"Received: {data!r}")
+                for callback in callbacks:
+                    callback(data)
+        except serial.SerialException as e:
+            print(f"Read error: {e}")
+            break
+        except Exception as e:
+            print(f"Read error: {e}")
+
+def close_serial():
+    """Cerrar puerto serial"""
+    global ser, serial_connected
+    serial_connected = False
+    _stop_evt.set()
+    if ser:
+        try:
+            # Despertar al lector bloqueado en readline()
+            ser.cancel_read()
+        except Exception:
+            pass
+    with _ser_lock:
+        if ser and ser.is_open:
+            ser.close()
+            print("Serial port closed")
+
+
+def main(page: ft.Page):
+    page.title = "SCARA Robot Control"
+    page.window_width = 1400
+    page.window_height = 900
+    page.theme_mode = ft.ThemeMode.LIGHT
+    
+    robot = RobotModel()
+    robot.load_from_file()
+
+    # SnackBar compartido: una sola instancia reutilizada en vez de
+    # crear un SnackBar + Text nuevos por cada notificación
+    _snack = ft.SnackBar(ft.Text(""))
+    page.snack_bar = _snack
+
+    def toast(msg):
+        """Mostrar una notificación en el SnackBar compartido"""
+        _snack.content.value = msg
+        _snack.open = True
+        page.update()
+
+
+
+        
+    # ==================== SERIAL COMMUNICATION SETUP ====================
+    
+    # Intentar conectar al puerto serial
+    serial_port = 'COM6'  # Cambiado de COM3 a COM11
+    init_serial(serial_port, 9600)
+    
+    # Variable para estado del serial
+    serial_status_text = ft.Text("Serial: Desconectado", size=12, color=ft.colors.RED)
+    
+    def update_serial_status():
+        """Actualizar estado del serial en la UI"""
+        if serial_connected:
+            serial_status_text.value = "Serial: Conectado (COM)"
+            serial_status_text.color = ft.colors.GREEN
+        else:
+            serial_status_text.value = "Serial: Desconectado"
+            serial_status_text.color = ft.colors.RED
+        page.update()
+    
+    # Callback para datos recibidos del serial
+    def _set_joint(slider, payload):
+        """Asignar un valor numérico recibido a un slider y refrescar la UI"""
+        try:
+            slider.value = float(payload)
+            update_sliders_and_info()
+        except:
+            pass
+
+    # Slider destino por eje para el camino rápido de telemetría
+    # (se llena más abajo, una vez creados los sliders)
+    joint_sliders = {}
+
+    # Despacho O(1) por el token antes de ':' para los comandos de texto
+    serial_handlers = {
+        b'SAVE_POS': lambda payload: save_position_teach(None),
+        b'RUN_PROG': lambda payload: run_program(None),
+        b'CLEAR_PROG': lambda payload: clear_program(None),
+    }
+
+    def on_serial_data(data):
+        """Procesar una línea cruda (bytes) recibida del puerto serial"""
+        print(f"Processing serial data: {data!r}")
+        # Camino rápido: una línea numérica de eje en un solo match
+        m = _TELEM_PAT.match(data)
+        if m:
+            slider = joint_sliders.get(m.group(1))
+            if slider is not None:
+                # float() acepta bytes ASCII directamente
+                _set_joint(slider, m.group(2))
+            return
+        tok, _, payload = data.partition(b':')
+        handler = serial_handlers.get(tok)
+        if handler:
+            handler(payload)
+    
+    # Iniciar thread de lectura serial
+    threading.Thread(
+        target=read_serial_thread,
+        args=([on_serial_data],),
+        daemon=True
+    ).start()
+    
+    update_serial_status()
+    
+    # ==================== JOYSTICK SETUP ====================
+    
+    def joystick_thread():
+        """Thread para leer eventos del joystick"""
+        # Import diferido: pygame arrastra las libs de SDL (decenas de
+        # MB y cientos de ms); cargarlo en este thread y no al arranque
+        import pygame
+
+        pygame.init()
+        joystick_count = pygame.joystick.get_count()
+        
+        if joystick_count > 0:
+            my_joystick = pygame.joystick.Joystick(0)
+            my_joystick.init()
+            print(f"Joystick conectado: {my_joystick.get_name()}")
+            
+            while True:
+                for event in pygame.event.get():
+                    if event.type == pygame.JOYBUTTONUP:
+                        button_number = event.button
+                        print(f"Button {button_number} released")
+                        
+                        if button_number == 0:
+                            robot.y -= 1
+                        elif button_number == 1:
+                            robot.x -= 1
+                        elif button_number == 2:
+                            robot.x += 1
+                        elif button_number == 3:
+                            robot.y += 1
+                        elif button_number == 4:
+                            robot.z = 1000
+                        elif button_number == 5:
+                            robot.z = 0
+                        elif button_number == 10:
+                            # Mover a posición home
+                            robot.x = -2.9083
+                            robot.y = 18.4983
+                            robot.z = 0
+                        
+                        # Calcular cinemática inversa con los nuevos valores
+                        if button_number in [0, 1, 2, 3, 4, 5, 10]:
+                            if robot.inverse_kinematics(robot.x, robot.y):
+                                # Actualizar sliders con los nuevos ángulos calculados
+                                j1_slider.value = robot.angle1
+                                j2_slider.value = robot.angle2
+                                z_slider.value = robot.z
+                                
+                                # Actualizar displays
+                                x_display.value = f"X: {robot.x:.2f}"
+                                y_display.value = f"Y: {robot.y:.2f}"
+                                z_display.value = f"Z: {robot.z:.2f}"
+                                
+                                # Actualizar campos de cinemática inversa
+                                x_input.value = f"{robot.x:.2f}"
+                                y_input.value = f"{robot.y:.2f}"
+                                z_input.value = f"{robot.z:.2f}"
+                                
+                                # Actualizar valores de ángulos
+                                j1_value.value = f"{robot.angle1:.1f}"
+                                j2_value.value = f"{robot.angle2:.1f}"
+                                z_value.value = f"{robot.z:.1f}"
+                                
+                                # Enviar comandos al serial
+                                send_move(robot.angle1, robot.angle2, robot.z)
+                                send_serial("d\n")
+                                
+                                page.update()
+                            else:
+                                print("Posición inalcanzable")
+                                # Revertir el cambio si la posición es inalcanzable
+                                if button_number == 0:
+                                    robot.y += 1
+                                elif button_number == 1:
+                                    robot.x += 1
+                                elif button_number == 2:
+                                    robot.x -= 1
+                                elif button_number == 3:
+                                    robot.y -= 1
+                                elif button_number == 10:
+                                    # No revertir para home, mantener valores anteriores
+                                    pass
+
+                
+                pygame.time.wait(10)
+        else:
+            print("No joysticks connected.")
+    
+    # Iniciar thread del joystick
+    threading.Thread(target=joystick_thread, daemon=True).start()
+    
+    # ==================== FORWARD KINEMATICS SECTION ====================
+    
+    j1_slider = ft.Slider(min=-200, max=266, value=0, width=300, label="J1")
+    j2_slider = ft.Slider(min=-300, max=300, value=0, width=300, label="J2")
+    z_slider = ft.Slider(min=0, max=1000, value=0, width=300, label="Z")
+
+    joint_sliders.update({b'J1': j1_slider, b'J2': j2_slider, b'Z': z_slider})
+    
+    j1_value = ft.TextField(value="0", read_only=True, width=80)
+    j2_value = ft.TextField(value="0", read_only=True, width=80)
+    z_value = ft.TextField(value="0", read_only=True, width=80)
+    
+    j1_jog_val = ft.TextField(value="1", width=50, input_filter=ft.NumbersOnlyInputFilter())
+    j2_jog_val = ft.TextField(value="1", width=50, input_filter=ft.NumbersOnlyInputFilter())
+    z_jog_val = ft.TextField(value="1", width=50, input_filter=ft.NumbersOnlyInputFilter())
+    
+    # ==================== INVERSE KINEMATICS SECTION ====================
+    
+    x_input = ft.TextField(label="X", width=100, value="-2.91", keyboard_type=ft.KeyboardType.NUMBER)
+    y_input = ft.TextField(label="Y", width=100, value="18.50", keyboard_type=ft.KeyboardType.NUMBER)
+    z_input = ft.TextField(label="Z", width=100, value="0", keyboard_type=ft.KeyboardType.NUMBER)
+    
+    # ==================== TEACH MODE SECTION ====================
+    
+    positions_list = ft.ListView(expand=True, spacing=5)
+    last_position_text = ft.Text("Ultima posición guardada: Ninguna", size=14)
+    
+    # ==================== INFO DISPLAY ====================
+    
+    x_display = ft.Text("X: -2.91", size=14)
+    y_display = ft.Text("Y: 18.50", size=14)
+    z_display = ft.Text("Z: 0.00", size=14)
+    
+    # Controles que cambian en cada tick de slider: actualizarlos de a
+    # uno en vez de re-diffear la página entera con page.update()
+    _live_controls = (
+        j1_slider, j2_slider, z_slider,
+        j1_value, j2_value, z_value,
+        x_display, y_display, z_display,
+        x_input, y_input, z_input,
+    )
+
+    def refresh_info_displays():
+        """Volcar el estado actual del robot a los campos de la UI"""
+        j1_value.value = f"{robot.angle1:.1f}"
+        j2_value.value = f"{robot.angle2:.1f}"
+        z_value.value = f"{robot.z:.1f}"
+        
+        x_display.value = f"X: {robot.x:.2f}"
+        y_display.value = f"Y: {robot.y:.2f}"
+        z_display.value = f"Z: {robot.z:.2f}"
+        
+        # Actualizar también los campos de cinemática inversa
+        x_input.value = f"{robot.x:.2f}"
+        y_input.value = f"{robot.y:.2f}"
+        z_input.value = f"{robot.z:.2f}"
+
+        for ctrl in _live_controls:
+            if ctrl.page is not None:
+                ctrl.update()
+
+    def update_sliders_and_info():
+        """Actualizar información después de cambios en sliders"""
+        # Los sliders de Flet ya entregan floats, sin reparsear; si la
+        # terna no cambió, ni FK ni refresh de UI
+        if robot.update_angles(j1_slider.value, j2_slider.value, z_slider.value):
+            refresh_info_displays()
+
+    # Debounce de sliders: un drag dispara decenas de eventos por segundo;
+    # coalescer cada ráfaga en un solo refresh de UI + un solo envío serial
+    SLIDER_DEBOUNCE_S = 0.04
+    _flush_timer = None
+
+    def _flush_slider_change():
+        """Aplicar el último valor de los sliders (una vez por ráfaga)"""
+        nonlocal _flush_timer
+        _flush_timer = None
+        update_sliders_and_info()
+        send_move(robot.angle1, robot.angle2, robot.z)
+
+    def on_slider_change(e):
+        """Reiniciar la ventana de debounce; el timer garantiza el flush final"""
+        nonlocal _flush_timer
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+        _flush_timer = threading.Timer(SLIDER_DEBOUNCE_S, _flush_slider_change)
+        _flush_timer.daemon = True
+        _flush_timer.start()
+
+    j1_slider.on_change = on_slider_change
+    j2_slider.on_change = on_slider_change
+    z_slider.on_change = on_slider_change
+    
+    # Paso de jog cacheado como float: se parsea una sola vez en el
+    # on_change del TextField, no en cada click de los botones +/-
+    j1_jog_step = [1.0]
+    j2_jog_step = [1.0]
+
+    def _bind_jog_step(field, holder):
+        def _on_change(e):
+            try:
+                holder[0] = float(e.control.value or 0)
+            except:
+                pass
+        field.on_change = _on_change
+
+    _bind_jog_step(j1_jog_val, j1_jog_step)
+    _bind_jog_step(j2_jog_val, j2_jog_step)
+
+    def jog_minus(slider, step):
+        slider.value = max(slider.min, slider.value - step[0])
+        update_sliders_and_info()
+        # Enviar comandos al serial
+        send_move(robot.angle1, robot.angle2, robot.z)
+
+    def jog_plus(slider, step):
+        slider.value = min(slider.max, slider.value + step[0])
+        update_sliders_and_info()
+        # Enviar comandos al serial
+        send_move(robot.angle1, robot.angle2, robot.z)
+    
+    def bajar_plumon(e):
+        """Bajar plumón - establecer Z en 0"""
+        z_slider.value = 0
+        robot.set_angles(robot.angle1, robot.angle2, 0)
+        z_value.value = "0.0"
+        z_display.value = "Z: 0.00"
+        z_input.value = "0"
+        send_axis('Z', 0)
+        toast("Plumón bajado")
+    
+    def subir_plumon(e):
+        """Subir plumón - establecer Z en 1000"""
+        z_slider.value = 1000
+        robot.set_angles(robot.angle1, robot.angle2, 1000)
+        z_value.value = "1000.0"
+        z_display.value = "Z: 1000.00"
+        z_input.value = "1000"
+        send_axis('Z', 1000)
+        toast("Plumón subido")
+    
+    # JOG buttons
+    j1_minus_btn = ft.ElevatedButton("-", width=70, on_click=lambda e: jog_minus(j1_slider, j1_jog_step))
+    j1_plus_btn = ft.ElevatedButton("+", width=70, on_click=lambda e: jog_plus(j1_slider, j1_jog_step))
+
+    j2_minus_btn = ft.ElevatedButton("-", width=70, on_click=lambda e: jog_minus(j2_slider, j2_jog_step))
+    j2_plus_btn = ft.ElevatedButton("+", width=70, on_click=lambda e: jog_plus(j2_slider, j2_jog_step))
+    
+    bajar_plumon_btn = ft.ElevatedButton("Bajar plumón", width=150, on_click=bajar_plumon)
+    subir_plumon_btn = ft.ElevatedButton("Subir plumón", width=150, on_click=subir_plumon)
+    
+    def bajar_plumon_ik(e):
+        """Bajar plumón en cinemática inversa - establecer Z en 0"""
+        z_input.value = "0"
+        page.update()
+    
+    def subir_plumon_ik(e):
+        """Subir plumón en cinemática inversa - establecer Z en 1000"""
+        z_input.value = "1000"
+        page.update()
+    
+    bajar_plumon_ik_btn = ft.ElevatedButton("Bajar plumón", width=120, on_click=bajar_plumon_ik)
+    subir_plumon_ik_btn = ft.ElevatedButton("Subir plumón", width=120, on_click=subir_plumon_ik)
+    
+    def move_to_position(e):
+        """Mover a posición usando IK"""
+        try:
+            x = float(x_input.value)
+            y = float(y_input.value)
+            z = float(z_input.value)
+            
+            # Validar que Z esté dentro del rango del slider
+            if z < 0:
+                z = 0
+            elif z > 1000:
+                z = 1000
+            
+            if robot.inverse_kinematics(x, y):
+                # Validar que los ángulos estén dentro del rango de los sliders
+                angle1 = max(-200, min(266, robot.angle1))
+                angle2 = max(-300, min(300, robot.angle2))
+                
+                j1_slider.value = angle1
+                j2_slider.value = angle2
+                z_slider.value = z
+                
+                # Actualizar el robot con los valores validados
+                robot.set_angles(angle1, angle2, z)
+                
+                # Actualizar todos los campos
+                j1_value.value = f"{robot.angle1:.1f}"
+                j2_value.value = f"{robot.angle2:.1f}"
+                z_value.value = f"{robot.z:.1f}"
+                
+                # Mantener los valores originales de X, Y, Z que el usuario ingresó
+                x_display.value = f"X: {x:.2f}"
+                y_display.value = f"Y: {y:.2f}"
+                z_display.value = f"Z: {z:.2f}"
+                
+                # NO actualizar los campos de entrada para mantener los valores originales
+                # Los campos de entrada ya tienen los valores correctos
+                
+                # Enviar comandos al serial
+                send_move(robot.angle1, robot.angle2, robot.z)
+
+                page.update()
+            else:
+                toast("¡Posición inalcanzable!")
+        except:
+            toast("Error en valores ingresados")
+    
+    move_btn = ft.ElevatedButton("MOVE TO POSITION", width=300, on_click=move_to_position)
+    
+    def move_to_home(e):
+        """Mover a posición home (q1=0, q2=0, Z=0)"""
+        try:
+            # Establecer ángulos directamente en 0
+            j1_slider.value = 0
+            j2_slider.value = 0
+            z_slider.value = 0
+            
+            # Actualizar el robot
+            robot.update_angles(0, 0, 0)
+            
+            # Actualizar todos los campos
+            j1_value.value = "0.0"
+            j2_value.value = "0.0"
+            z_value.value = "0.0"
+            
+            # Establecer las coordenadas específicas para home
+            x_display.value = "X: -2.90"
+            y_display.value = "Y: 18.49"
+            z_display.value = "Z: 0.00"
+            
+            # Actualizar campos de entrada con las coordenadas de home
+            x_input.value = "-2.9083"
+            y_input.value = "18.4984"
+            z_input.value = "0"
+            
+            # Enviar comandos al serial
+            send_move(0, 0, 0)
+            
+            toast("¡Movido a posición HOME (q1=0, q2=0, Z=0)!")
+        except Exception as ex:
+            toast(f"Error al mover a HOME: {str(ex)}")
+    
+    home_btn = ft.ElevatedButton("MOVER A HOME", width=300, on_click=move_to_home, bgcolor=ft.colors.ORANGE_400, color=ft.colors.WHITE)
+    
+    # Estilo compartido de las filas de posiciones: reutilizar los
+    # mismos objetos de borde/color en vez de reconstruirlos por fila
+    _row_border = ft.border.all(1, ft.colors.BLUE_200)
+    _row_bg = ft.colors.BLUE_50
+
+    def _on_delete_click(e):
+        """Handler único de borrado: el índice viaja en control.data,
+        sin crear una lambda con celda capturada por fila"""
+        delete_position(e.control.data)
+
+    def make_pos_row(i, a1, a2, z):
+        """Crear la fila visual de la posición i"""
+        return ft.Container(
+            content=ft.Row([
+                ft.Text(f"Pos {i+1}: J1={a1}° J2={a2}° Z={z}", size=12),
+                ft.IconButton(ft.icons.DELETE, data=i, on_click=_on_delete_click),
+            ]),
+            padding=10,
+            border=_row_border,
+            border_radius=5,
+            bgcolor=_row_bg,
+        )
+
+    def save_position_teach(e):
+        """Guardar posición actual en modo Teach"""
+        idx = robot.save_position()
+        a1, a2, z = robot.position(idx)
+
+        # Enviar al serial
+        send_serial(f"POS_SAVED:{idx+1},J1={a1},J2={a2},Z={z}")
+
+        # Agregar a lista visual
+        positions_list.controls.append(make_pos_row(idx, a1, a2, z))
+
+        last_position_text.value = f"Ultima posición guardada: #{idx+1}"
+        
+        toast(f"¡Posición {idx+1} guardada!")
+    
+    def delete_position(idx):
+        """Eliminar una posición"""
+        if 0 <= idx < robot.num_positions:
+            robot.delete_position(idx)
+            # Sacar solo el control afectado y renumerar las etiquetas
+            # restantes, en lugar de reconstruir N widgets por borrado
+            positions_list.controls.pop(idx)
+            for i, ctrl in enumerate(positions_list.controls[idx:], start=idx):
+                a1, a2, z = robot.position(i)
+                row = ctrl.content.controls
+                row[0].value = f"Pos {i+1}: J1={a1}° J2={a2}° Z={z}"
+                row[1].data = i
+
+            page.update()
+    
+    # Cadencia de setpoints hacia la placa durante la reproducción:
+    # acompasada a lo que el MCU puede mover, no a la velocidad del loop
+    PROGRAM_STEP_S = 0.05
+
+    def _run_program_worker():
+        """Reproducir el programa a cadencia fija (en thread aparte)"""
+        try:
+            send_serial("RUN_PROGRAM")
+            # FK vectorizada: X, Y de todo el programa en una sola
+            # pasada NumPy en lugar de trig escalar por paso
+            xs, ys = robot.fk_batch()
+            for i, ((a1, a2, z), x, y) in enumerate(zip(robot.iter_positions(), xs, ys)):
+                start = time.monotonic()
+                send_move(a1, a2, z)
+                j1_slider.value = a1
+                j2_slider.value = a2
+                z_slider.value = z
+                robot.set_angles(a1, a2, z)
+                robot.x = x
+                robot.y = y
+                # La placa recibe todos los setpoints, pero la UI solo
+                # se refresca cada 10 pasos (y al final)
+                if i % 10 == 0:
+                    refresh_info_displays()
+                elapsed = time.monotonic() - start
+                time.sleep(max(0.0, PROGRAM_STEP_S - elapsed))
+            refresh_info_displays()
+        finally:
+            robot.program_running = False
+
+    def run_program(e):
+        """Ejecutar programa guardado"""
+        if robot.num_positions == 0:
+            toast("¡No hay posiciones guardadas!")
+            return
+        if robot.program_running:
+            toast("¡Programa ya en ejecución!")
+            return
+
+        # Reproducir en un thread para no congelar la UI
+        robot.program_running = True
+        threading.Thread(target=_run_program_worker, daemon=True).start()
+    
+    def clear_program(e):
+        """Limpiar programa"""
+        robot.clear_positions()
+        positions_list.controls.clear()
+        last_position_text.value = "Ultima posición guardada: Ninguna"
+        send_serial("CLEAR_PROGRAM")
+        toast("¡Programa eliminado!")
+    
+    def save_program(e):
+        """Guardar programa a archivo"""
+        if robot.save_to_file():
+            send_serial(f"SAVE_PROGRAM:{robot.num_positions}")
+            toast("¡Programa guardado!")
+    
+    save_position_btn = ft.ElevatedButton("Guardar posición", width=200, on_click=save_position_teach)
+    run_program_btn = ft.ElevatedButton("Ejecutar programa", width=200, on_click=run_program)
+    clear_btn = ft.ElevatedButton("Limpiar", width=100, on_click=clear_program)
+    save_program_btn = ft.ElevatedButton("Guardar programa", width=200, on_click=save_program)
+    
+    # ==================== LAYOUT ====================
+    
+    forward_kinematics_section = ft.Container(
+        content=ft.Column([
+            ft.Text("Cinemática directa", size=18, weight="bold", color=ft.colors.BLUE_900),
+            ft.Divider(),
+            
+            # J1
+            ft.Row([ft.Text("q1", size=14, width=40, weight="bold"), j1_slider, j1_value], spacing=10),
+            ft.Row([ft.Text("", size=14, width=40), j1_minus_btn, j1_jog_val, j1_plus_btn], spacing=5),
+            
+            # J2
+            ft.Row([ft.Text("q2", size=14, width=40, weight="bold"), j2_slider, j2_value], spacing=10),
+            ft.Row([ft.Text("", size=14, width=40), j2_minus_btn, j2_jog_val, j2_plus_btn], spacing=5),
+            
+            # Z
+            ft.Row([ft.Text("Z", size=14, width=40, weight="bold"), z_slider, z_value], spacing=10),
+            ft.Row([ft.Text("", size=14, width=40), bajar_plumon_btn, subir_plumon_btn], spacing=5),
+            
+            ft.Divider(),
+            ft.Text("Resultado de cinemática directa", size=14, weight="bold"),
+            x_display,
+            y_display,
+            z_display,
+        ]),
+        padding=20,
+        border=ft.border.all(2, ft.colors.BLUE_400),
+        border_radius=10,
+        bgcolor=ft.colors.BLUE_50,
+    )
+    
+    inverse_kinematics_section = ft.Container(
+        content=ft.Column([
+            ft.Text("Cinemática inversa", size=18, weight="bold", color=ft.colors.GREEN_900),
+            ft.Divider(),
+            
+            ft.Row([x_input, y_input, z_input, bajar_plumon_ik_btn, subir_plumon_ik_btn], spacing=10),
+            move_btn,
+            home_btn,
+        ]),
+        padding=20,
+        border=ft.border.all(2, ft.colors.GREEN_400),
+        border_radius=10,
+        bgcolor=ft.colors.GREEN_50,
+    )
+    
+    teach_section = ft.Container(
+        content=ft.Column([
+            ft.Text("Modo Teach - Guardar posiciones", size=18, weight="bold", color=ft.colors.PINK_700),
+            ft.Divider(),
+            
+            last_position_text,
+            
+            ft.Row([save_position_btn, run_program_btn], spacing=10),
+            ft.Row([save_program_btn, clear_btn], spacing=10),
+            
+            ft.Text("Posiciones guardadas:", size=14, weight="bold"),
+            ft.Container(
+                content=positions_list,
+                height=250,
+                border=ft.border.all(1, ft.colors.GREY_300),
+                border_radius=5,
+            ),
+        ]),
+        padding=20,
+        border=ft.border.all(2, ft.colors.PINK_700),
+        border_radius=10,
+        bgcolor=ft.colors.PINK_50,
+        expand=True,
+    )
+    
+    # Layout principal
+    page.add(
+        ft.AppBar(
+            title=ft.Row([
+                ft.Text("Control del Robot SCARA", size=24, weight="bold"),
+                ft.VerticalDivider(),
+                serial_status_text,
+            ], spacing=20),
+            bgcolor=ft.colors.BLUE_900,
+            color=ft.colors.WHITE,
+        ),
+        ft.Row([
+            teach_section,
+            ft.Column([
+                forward_kinematics_section,
+                inverse_kinematics_section,
+            ], width=650, scroll=ft.ScrollMode.AUTO),
+        ], expand=True),
+    )
+    
+    # Inicializar información con valores home
+    # No llamar a update_sliders_and_info() porque sobrescribe los valores iniciales
+    x_input.value = f"{robot.x:.2f}"
+    y_input.value = f"{robot.y:.2f}"
+    z_input.value = f"{robot.z:.2f}"
+
+    # Cargar posiciones guardadas antes del page.update() inicial: un solo
+    # extend y un solo render, en vez de append por fila tras el update
+    if robot.num_positions:
+        positions_list.controls.extend(
+            make_pos_row(i, a1, a2, z)
+            for i, (a1, a2, z) in enumerate(robot.iter_positions())
+        )
+
+    page.update()
+
+    # Enviar valores iniciales a la placa
+    send_move(robot.angle1, robot.angle2, robot.z)
+
+if __name__ == "__main__":
+    ft.app(target=main)